@@ -0,0 +1,304 @@
+"""Discrete-event capacity simulator for the LOCAL_WARM / APEX_CLOUD tiers.
+
+Replays session traces through the production pressure estimator and tier
+router against modelled vLLM replicas, the Groq apex tier and the KEDA
+scaling rule, so routing and autoscaling settings can be swept offline.
+
+    python -m debate_vertex.core.simulator --sessions 5000 --apex-threshold 6.5 7.2 8.0
+"""
+import argparse
+import heapq
+import math
+import random
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from pydantic import BaseModel
+
+from ..models.brain_router import APEX_THRESHOLD, route_tier
+from ..models.threshold_controller import ControllerConfig, ThresholdController
+from ..orchestrator.cue_extractors import estimate_debate_pressure
+
+ARRIVAL, LOCAL_DONE, POLL, REPLICA_READY = range(4)
+
+SYNTHETIC_TEXTS = [
+    "I think that is a reasonable point.",
+    "Maybe, but the data is mixed on that question.",
+    "That is true because the studies show consistent gains.",
+    "You must accept that the evidence proves my case.",
+    "You are wrong, this is obviously never going to work!",
+    "That is a fallacy and you cannot possibly defend it, it is impossible.",
+]
+
+
+class TraceMessage(NamedTuple):
+    session_id: str
+    arrival: float
+    timer: float
+    text: str
+    pressure: float
+
+
+class SimConfig(BaseModel):
+    apex_threshold: float = APEX_THRESHOLD
+    apex_enabled: bool = True
+    # Tune the threshold online with the production ThresholdController (starts from its baseline)
+    adaptive: bool = False
+    controller: ControllerConfig = ControllerConfig()
+    # Local vLLM pool (k3s/deployment-warm-llm.yaml + keda-scaledobject-llm.yaml)
+    min_replicas: int = 1
+    max_replicas: int = 2
+    keda_threshold: float = 8.0
+    polling_interval: float = 30.0
+    scale_down_delay: float = 300.0
+    cold_start: float = 120.0
+    slots_per_replica: int = 8
+    local_mean_s: float = 2.5
+    local_sigma: float = 0.6
+    # Apex tier (Groq)
+    apex_mean_s: float = 1.2
+    apex_sigma: float = 0.4
+    apex_cost_per_request: float = 0.0008
+    seed: int = 0
+
+
+class SimResult(BaseModel):
+    config: SimConfig
+    messages: int
+    apex_requests: int
+    mean_queue_delay_s: float
+    p95_queue_delay_s: float
+    p95_latency_s: float
+    timer_miss_rate: float
+    apex_spend: float
+    replica_seconds: float
+    peak_replicas: int
+    final_threshold: float
+
+
+def prepare_trace(messages: Iterable[dict]) -> List[TraceMessage]:
+    """Normalise raw messages and score pressure once with the real estimator.
+
+    Each message needs `session_id`, `arrival`, `timer` and `text`; a recorded
+    `pressure` is reused as-is. Pressure does not depend on the simulated
+    configuration, so a prepared trace can be swept without re-scoring.
+    """
+    cache: Dict[tuple, float] = {}
+    prepared = []
+    for m in messages:
+        pressure = m.get("pressure")
+        if pressure is None:
+            key = (m["text"], m["timer"])
+            if key not in cache:
+                cache[key] = estimate_debate_pressure(m["text"], m["timer"])
+            pressure = cache[key]
+        prepared.append(TraceMessage(m["session_id"], m["arrival"], m["timer"], m["text"], pressure))
+    prepared.sort(key=lambda m: m.arrival)
+    return prepared
+
+
+def synthetic_trace(sessions: int, sessions_per_second: float = 0.2, min_turns: int = 3,
+                    max_turns: int = 12, seed: int = 0) -> List[TraceMessage]:
+    rng = random.Random(seed)
+    raw = []
+    start = 0.0
+    for s in range(sessions):
+        start += rng.expovariate(sessions_per_second)
+        t = start
+        for _ in range(rng.randint(min_turns, max_turns)):
+            t += rng.uniform(15.0, 60.0)
+            raw.append({
+                "session_id": f"sim-{s}",
+                "arrival": t,
+                "timer": round(rng.uniform(1.0, 30.0), 1),
+                "text": rng.choice(SYNTHETIC_TEXTS),
+            })
+    return prepare_trace(raw)
+
+
+def trace_from_transcript(directory: str) -> List[TraceMessage]:
+    """Build a trace from user turns recorded by `core.transcript.TranscriptLog`."""
+    from .transcript import replay
+
+    raw = []
+    for record in replay(directory):
+        if record.get("role") != "user":
+            continue
+        raw.append({
+            "session_id": record["session_id"],
+            "arrival": record["ts"],
+            "timer": record.get("timer") if record.get("timer") is not None else 30.0,
+            "text": record["text"],
+            "pressure": record.get("pressure"),
+        })
+    # Writers are replayed one after another, so rebase on the earliest turn overall
+    origin = min((m["arrival"] for m in raw), default=0.0)
+    for m in raw:
+        m["arrival"] -= origin
+    return prepare_trace(raw)
+
+
+def _lognormal(rng: random.Random, mean: float, sigma: float) -> float:
+    return rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def simulate(trace: List[TraceMessage], config: Optional[SimConfig] = None) -> SimResult:
+    config = config or SimConfig()
+    rng = random.Random(config.seed)
+    events = []
+    seq = 0
+
+    def push(t, kind, payload=None):
+        nonlocal seq
+        heapq.heappush(events, (t, seq, kind, payload))
+        seq += 1
+
+    for m in trace:
+        push(m.arrival, ARRIVAL, m)
+    if trace:
+        push(trace[0].arrival + config.polling_interval, POLL)
+    end_of_trace = trace[-1].arrival if trace else 0.0
+
+    ready = config.min_replicas
+    target = config.min_replicas
+    peak = ready
+    busy = 0
+    waiting = deque()
+    window_max = 0.0
+    last_needed = 0.0
+    replica_seconds = 0.0
+    last_t = trace[0].arrival if trace else 0.0
+
+    queue_delays = []
+    latencies = []
+    misses = 0
+    apex_requests = 0
+    controller = ThresholdController(config.controller) if config.adaptive else None
+    threshold = controller.threshold if controller else config.apex_threshold
+
+    def start_local(m, now):
+        nonlocal busy
+        busy += 1
+        queue_delays.append(now - m.arrival)
+        push(now + _lognormal(rng, config.local_mean_s, config.local_sigma), LOCAL_DONE, m)
+
+    def finish(m, done_at, tier):
+        nonlocal misses
+        latency = done_at - m.arrival
+        latencies.append(latency)
+        if latency > m.timer:
+            misses += 1
+        if controller:
+            controller.observe_turn(tier, latency, m.timer)
+
+    while events:
+        now, _, kind, payload = heapq.heappop(events)
+        replica_seconds += ready * (now - last_t)
+        last_t = now
+
+        if kind == ARRIVAL:
+            window_max = max(window_max, payload.pressure)
+            if controller:
+                threshold = controller.update(now, busy + len(waiting), ready * config.slots_per_replica)
+            if route_tier(payload.pressure, config.apex_enabled, threshold) == "APEX_CLOUD":
+                apex_requests += 1
+                queue_delays.append(0.0)
+                finish(payload, now + _lognormal(rng, config.apex_mean_s, config.apex_sigma), "APEX_CLOUD")
+            elif busy < ready * config.slots_per_replica:
+                start_local(payload, now)
+            else:
+                waiting.append(payload)
+
+        elif kind == LOCAL_DONE:
+            busy -= 1
+            finish(payload, now, "LOCAL_WARM")
+            if waiting and busy < ready * config.slots_per_replica:
+                start_local(waiting.popleft(), now)
+
+        elif kind == REPLICA_READY:
+            if ready < target:
+                ready += 1
+                peak = max(peak, ready)
+                while waiting and busy < ready * config.slots_per_replica:
+                    start_local(waiting.popleft(), now)
+
+        elif kind == POLL:
+            # KEDA prometheus trigger: desired = ceil(max(debate_pressure_score) / threshold)
+            desired = math.ceil(window_max / config.keda_threshold) if window_max else 0
+            desired = min(max(desired, config.min_replicas), config.max_replicas)
+            window_max = 0.0
+            if desired >= target:
+                last_needed = now
+                for _ in range(desired - target):
+                    push(now + config.cold_start, REPLICA_READY)
+                target = desired
+            elif now - last_needed >= config.scale_down_delay:
+                target = desired
+                ready = min(ready, target)
+            if now < end_of_trace or waiting or busy:
+                push(now + config.polling_interval, POLL)
+
+    queue_delays.sort()
+    latencies.sort()
+    n = len(trace)
+    return SimResult(
+        config=config,
+        messages=n,
+        apex_requests=apex_requests,
+        mean_queue_delay_s=sum(queue_delays) / n if n else 0.0,
+        p95_queue_delay_s=_percentile(queue_delays, 0.95),
+        p95_latency_s=_percentile(latencies, 0.95),
+        timer_miss_rate=misses / n if n else 0.0,
+        apex_spend=apex_requests * config.apex_cost_per_request,
+        replica_seconds=replica_seconds,
+        peak_replicas=peak,
+        final_threshold=threshold,
+    )
+
+
+def sweep(trace: List[TraceMessage], configs: Iterable[SimConfig]) -> List[SimResult]:
+    return [simulate(trace, c) for c in configs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep tier routing and KEDA settings over a session trace")
+    parser.add_argument("--transcripts", help="TRANSCRIPT_DIR to replay instead of a synthetic trace")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--sessions-per-second", type=float, default=0.2)
+    parser.add_argument("--apex-threshold", type=float, nargs="+", default=[APEX_THRESHOLD])
+    parser.add_argument("--keda-threshold", type=float, nargs="+", default=[8.0])
+    parser.add_argument("--max-replicas", type=int, nargs="+", default=[2])
+    parser.add_argument("--adaptive", action="store_true", help="Also run each config with the online threshold controller")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.transcripts:
+        trace = trace_from_transcript(args.transcripts)
+    else:
+        trace = synthetic_trace(args.sessions, args.sessions_per_second, seed=args.seed)
+
+    configs = [
+        SimConfig(apex_threshold=a, keda_threshold=k, max_replicas=r, seed=args.seed,
+                  adaptive=adaptive, controller=ControllerConfig(baseline=a))
+        for a in args.apex_threshold for k in args.keda_threshold for r in args.max_replicas
+        for adaptive in ((False, True) if args.adaptive else (False,))
+    ]
+    print(f"{'apex_thr':>8} {'adapt':>5} {'final':>6} {'keda_thr':>8} {'max_rep':>7} {'q_mean':>7} {'q_p95':>7} "
+          f"{'miss%':>6} {'apex%':>6} {'spend':>8} {'rep_h':>7}")
+    for r in sweep(trace, configs):
+        c = r.config
+        print(f"{c.apex_threshold:>8.2f} {'yes' if c.adaptive else 'no':>5} {r.final_threshold:>6.2f} "
+              f"{c.keda_threshold:>8.2f} {c.max_replicas:>7d} "
+              f"{r.mean_queue_delay_s:>7.2f} {r.p95_queue_delay_s:>7.2f} "
+              f"{100 * r.timer_miss_rate:>6.1f} {100 * r.apex_requests / max(r.messages, 1):>6.1f} "
+              f"{r.apex_spend:>8.3f} {r.replica_seconds / 3600:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
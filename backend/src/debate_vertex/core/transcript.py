@@ -0,0 +1,273 @@
+import fcntl
+import json
+import mmap
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Each record is framed as <u32 little-endian length><utf-8 JSON payload>
+FRAME_HEADER = struct.Struct("<I")
+ACTIVE_SUFFIX = ".log"
+SEALED_SUFFIX = ".log.z"
+READ_CHUNK = 64 * 1024
+LOCK_NAME = "writer.lock"
+
+
+def _segment_name(index: int) -> str:
+    return f"segment-{index:08d}"
+
+
+def _segment_index(path: Path) -> int:
+    return int(path.name.split(".")[0].split("-")[1])
+
+
+def _encode(record: dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def _seal(path: Path) -> Path:
+    """Compress a finished raw segment into its sealed form and drop the raw file."""
+    sealed = path.with_name(path.name[: -len(ACTIVE_SUFFIX)] + SEALED_SUFFIX)
+    tmp = sealed.with_name(sealed.name + ".tmp")
+    compressor = zlib.compressobj(6)
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        while chunk := src.read(READ_CHUNK):
+            dst.write(compressor.compress(chunk))
+        dst.write(compressor.flush())
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp, sealed)
+    path.unlink()
+    return sealed
+
+
+def _try_lock(directory: Path):
+    """Take the writer lock for `directory`, or return None if a live writer holds it."""
+    fd = os.open(directory / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _seal_stale(directory: Path):
+    for stale in sorted(directory.glob("segment-*" + ACTIVE_SUFFIX)):
+        _seal(stale)
+
+
+class TranscriptLog:
+    """Append-only, segmented transcript log.
+
+    Each writer process owns a `<hostname>-<pid>` subdirectory, held with an
+    flock for its lifetime, so rolling updates and multiple workers never
+    share a segment. `append` only enqueues; a background thread batches
+    records to the active segment and seals (compresses) it once it exceeds
+    `segment_bytes`.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024,
+                 batch_size: int = 256, flush_interval: float = 1.0, writer_id: Optional[str] = None):
+        self.root = Path(directory)
+        self.directory = self.root / (writer_id or f"{socket.gethostname()}-{os.getpid()}")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = _try_lock(self.directory)
+        if self._lock_fd is None:
+            raise RuntimeError(f"Transcript directory {self.directory} is held by another writer")
+        self.segment_bytes = segment_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        # Raw segments left behind by crashed writers (including a previous
+        # process with our name) are sealed; live writers keep their lock
+        _seal_stale(self.directory)
+        for sibling in self.root.iterdir():
+            if not sibling.is_dir() or sibling == self.directory:
+                continue
+            fd = _try_lock(sibling)
+            if fd is not None:
+                try:
+                    _seal_stale(sibling)
+                finally:
+                    os.close(fd)
+        indices = [_segment_index(p) for p in self.directory.glob("segment-*" + SEALED_SUFFIX)]
+        self._index = max(indices, default=-1) + 1
+        self._file = None
+        self._written = 0
+
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=100_000)
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Never block the event loop on disk; count what we lose instead
+            self.dropped += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        os.close(self._lock_fd)
+
+    def _open_segment(self):
+        path = self.directory / (_segment_name(self._index) + ACTIVE_SUFFIX)
+        self._file = open(path, "ab")
+        self._written = 0
+
+    def _rotate(self):
+        path = Path(self._file.name)
+        self._file.close()
+        self._file = None
+        _seal(path)
+        self._index += 1
+
+    def _write_batch(self, batch: list):
+        if self._file is None:
+            self._open_segment()
+        self._file.write(b"".join(_encode(r) for r in batch))
+        self._file.flush()
+        self._written = self._file.tell()
+        if self._written >= self.segment_bytes:
+            self._rotate()
+
+    def _run(self):
+        closing = False
+        while not closing:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print(f"Transcript write fail: {e}")
+        if self._file is not None:
+            self._rotate()
+
+
+def _iter_frames(buf) -> Iterator[dict]:
+    offset, size = 0, len(buf)
+    while offset + FRAME_HEADER.size <= size:
+        (length,) = FRAME_HEADER.unpack_from(buf, offset)
+        end = offset + FRAME_HEADER.size + length
+        if end > size:
+            # Torn write at the tail of an active segment
+            return
+        yield json.loads(bytes(buf[offset + FRAME_HEADER.size:end]))
+        offset = end
+
+
+def _iter_sealed(mm) -> Iterator[dict]:
+    decompressor = zlib.decompressobj()
+    pending = b""
+    for start in range(0, len(mm), READ_CHUNK):
+        pending += decompressor.decompress(mm[start:start + READ_CHUNK])
+        consumed = 0
+        view = memoryview(pending)
+        while consumed + FRAME_HEADER.size <= len(pending):
+            (length,) = FRAME_HEADER.unpack_from(view, consumed)
+            end = consumed + FRAME_HEADER.size + length
+            if end > len(pending):
+                break
+            yield json.loads(bytes(view[consumed + FRAME_HEADER.size:end]))
+            consumed = end
+        view.release()
+        pending = pending[consumed:]
+
+
+def _read_open(f, path: Path) -> Iterator[dict]:
+    if os.fstat(f.fileno()).st_size == 0:
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if path.name.endswith(SEALED_SUFFIX):
+            yield from _iter_sealed(mm)
+        else:
+            yield from _iter_frames(mm)
+
+
+def read_segment(path) -> Iterator[dict]:
+    """Stream records from one segment through a read-only memory map."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        yield from _read_open(f, path)
+
+
+def _read_surviving(path: Path) -> Iterator[dict]:
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        # The writer sealed this active segment after we listed it
+        if path.name.endswith(ACTIVE_SUFFIX):
+            sealed = path.with_name(path.name[: -len(ACTIVE_SUFFIX)] + SEALED_SUFFIX)
+            try:
+                f = open(sealed, "rb")
+            except FileNotFoundError:
+                return
+            path = sealed
+        else:
+            return
+    with f:
+        yield from _read_open(f, path)
+
+
+def _writer_segments(directory: Path, include_active: bool) -> list:
+    segments = {_segment_index(p): p for p in directory.glob("segment-*" + SEALED_SUFFIX)}
+    if include_active:
+        for p in directory.glob("segment-*" + ACTIVE_SUFFIX):
+            # Mid-seal both files can exist; the sealed one is complete
+            segments.setdefault(_segment_index(p), p)
+    return [segments[i] for i in sorted(segments)]
+
+
+def replay(directory: str, session_id: Optional[str] = None,
+           include_active: bool = True) -> Iterator[dict]:
+    """Yield every record, in segment order per writer, optionally filtered to one session."""
+    root = Path(directory)
+    if not root.is_dir():
+        return
+    writers = sorted(p for p in root.iterdir() if p.is_dir())
+    for writer in writers:
+        for path in _writer_segments(writer, include_active):
+            for record in _read_surviving(path):
+                if session_id is None or record.get("session_id") == session_id:
+                    yield record
+
+
+def turn_record(session_id: str, turn: int, role: str, text: str, pressure: float,
+                tier: str, latency_ms: Optional[float] = None,
+                timer: Optional[float] = None) -> dict:
+    return {
+        "ts": time.time(),
+        "session_id": session_id,
+        "turn": turn,
+        "role": role,
+        "text": text,
+        "pressure": pressure,
+        "tier": tier,
+        "latency_ms": latency_ms,
+        "timer": timer,
+    }
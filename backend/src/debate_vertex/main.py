@@ -1,4 +1,6 @@
+import asyncio
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from .orchestrator.deb8 import DebateManager
 
 app = FastAPI()
@@ -8,6 +10,28 @@ manager = DebateManager()
 async def health():
     return {"status": "vertex_active", "mode": "hybrid"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition
+    gauges = {
+        **manager.brain.apex_limiter.metrics(),
+        **manager.brain.local_pool.metrics(),
+        **manager.brain.threshold_controller.metrics(),
+        **manager.sessions.metrics(),
+    }
+    return "".join(f"debate_{name} {value}\n" for name, value in gauges.items())
+
+@app.on_event("startup")
+async def startup():
+    app.state.heartbeat = asyncio.create_task(manager.run_heartbeat())
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.heartbeat.cancel()
+    # Seal the active transcript segment so nothing is left uncompressed
+    if manager.transcript is not None:
+        manager.transcript.close()
+
 @app.websocket("/ws/debate")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
@@ -15,5 +39,6 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             data = await websocket.receive_json()
             await manager.process_message(websocket, data)
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the heartbeat already closed this socket
         manager.disconnect(websocket)
\ No newline at end of file
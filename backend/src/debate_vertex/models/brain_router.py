@@ -1,46 +1,246 @@
+import asyncio
 import os
+import socket
+import time
+from urllib.parse import urlsplit, urlunsplit
 import httpx
 from ..orchestrator.cue_extractors import estimate_debate_pressure
+from .generation import ThroughputEstimator, stop_sequences, trim_to_sentence
+from .rate_limiter import ApexRateLimiter, estimate_tokens
+from .threshold_controller import APEX_THRESHOLD, ControllerConfig, ThresholdController
+
+def route_tier(pressure: float, apex_available: bool, threshold: float = APEX_THRESHOLD) -> str:
+    if pressure > threshold and apex_available:
+        return "APEX_CLOUD"
+    return "LOCAL_WARM"
+
+class LocalEndpoint:
+    def __init__(self, url: str):
+        self.url = url
+        parts = urlsplit(url)
+        self.health_url = urlunsplit((parts.scheme, parts.netloc, "/health", "", ""))
+        self.outstanding = 0
+        self.ewma_latency = 1.0
+        self.failures = 0
+        self.healthy = True
+
+    def observe(self, latency: float, ok: bool, alpha: float = 0.3):
+        self.ewma_latency += alpha * (latency - self.ewma_latency)
+        self.failures = 0 if ok else self.failures + 1
+
+
+class EndpointPool:
+    """Least-outstanding-requests balancing over the vLLM replicas.
+
+    Each request goes to the healthy endpoint with the fewest in-flight
+    requests (ties broken by recent latency). Endpoints are ejected after
+    `eject_after` consecutive failures and readmitted by the /health probe.
+    With `discover`, hostnames are re-resolved every probe round so a
+    headless Service yields one endpoint per pod.
+    """
+
+    def __init__(self, urls: list, probe_interval: float = 5.0, eject_after: int = 3, discover: bool = False):
+        self.seeds = [u.strip() for u in urls if u.strip()]
+        self.endpoints = {u: LocalEndpoint(u) for u in self.seeds}
+        self.probe_interval = probe_interval
+        self.eject_after = eject_after
+        self.discover = discover
+        self._probe_task = None
+
+    def pick(self) -> LocalEndpoint:
+        candidates = [e for e in self.endpoints.values() if e.healthy]
+        # Fail open: if everything is ejected, keep trying rather than refusing service
+        candidates = candidates or list(self.endpoints.values())
+        return min(candidates, key=lambda e: (e.outstanding, e.ewma_latency))
+
+    async def post(self, client: httpx.AsyncClient, **kwargs) -> httpx.Response:
+        self._ensure_probing(client)
+        endpoint = self.pick()
+        endpoint.outstanding += 1
+        started = time.perf_counter()
+        ok = False
+        try:
+            resp = await client.post(endpoint.url, **kwargs)
+            ok = resp.status_code < 500
+            return resp
+        finally:
+            endpoint.outstanding -= 1
+            endpoint.observe(time.perf_counter() - started, ok)
+            if endpoint.failures >= self.eject_after:
+                endpoint.healthy = False
+
+    def _ensure_probing(self, client: httpx.AsyncClient):
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop(client))
+
+    async def _probe_loop(self, client: httpx.AsyncClient):
+        while True:
+            if self.discover:
+                await self._refresh()
+            await asyncio.gather(*(self._probe(client, e) for e in list(self.endpoints.values())))
+            await asyncio.sleep(self.probe_interval)
+
+    async def _probe(self, client: httpx.AsyncClient, endpoint: LocalEndpoint):
+        try:
+            resp = await client.get(endpoint.health_url, timeout=2.0)
+            endpoint.healthy = resp.status_code == 200
+        except Exception:
+            endpoint.healthy = False
+        if endpoint.healthy:
+            endpoint.failures = 0
+
+    async def _refresh(self):
+        loop = asyncio.get_running_loop()
+        urls = []
+        for seed in self.seeds:
+            parts = urlsplit(seed)
+            try:
+                infos = await loop.getaddrinfo(parts.hostname, parts.port, type=socket.SOCK_STREAM)
+            except OSError:
+                urls.append(seed)
+                continue
+            for address in sorted({info[4][0] for info in infos}):
+                host = f"[{address}]" if ":" in address else address
+                netloc = f"{host}:{parts.port}" if parts.port else host
+                urls.append(urlunsplit((parts.scheme, netloc, parts.path, parts.query, "")))
+        if urls:
+            # Keep in-flight counters and latency history for endpoints that survive
+            self.endpoints = {u: self.endpoints.get(u) or LocalEndpoint(u) for u in urls}
+
+    def metrics(self) -> dict:
+        return {
+            "local_endpoints_healthy": sum(e.healthy for e in self.endpoints.values()),
+            "local_outstanding_requests": sum(e.outstanding for e in self.endpoints.values()),
+        }
+
 
 class HybridBrain:
     def __init__(self):
-        # Local points to the K8s Service for vllm
+        # Local points to the K8s Service for vllm; VLLM_ENDPOINTS lists several replicas
         self.local_endpoint = os.getenv("VLLM_ENDPOINT", "http://vllm-warm:8000/v1/chat/completions")
+        self.local_pool = EndpointPool(
+            os.getenv("VLLM_ENDPOINTS", self.local_endpoint).split(","),
+            discover=os.getenv("VLLM_DISCOVER", "0") == "1",
+        )
         self.apex_url = os.getenv("APEX_API_URL", "https://api.groq.com/openai/v1/chat/completions")
         self.apex_key = os.getenv("APEX_API_KEY")
         self.client = httpx.AsyncClient(timeout=45.0)
+        self.apex_limiter = ApexRateLimiter(
+            requests_per_minute=float(os.getenv("APEX_RPM", "30")),
+            tokens_per_minute=float(os.getenv("APEX_TPM", "12000")),
+            max_queue_wait=float(os.getenv("APEX_MAX_QUEUE_WAIT", "1.0")),
+        )
+        self.local_speed = ThroughputEstimator(tokens_per_second=40.0, overhead=0.3)
+        self.apex_speed = ThroughputEstimator(tokens_per_second=250.0, overhead=0.4)
+        # Concurrent sequences one vLLM replica serves before requests start queueing
+        self.local_slots = int(os.getenv("VLLM_SLOTS_PER_ENDPOINT", "8"))
+        self.adaptive_threshold = os.getenv("ADAPTIVE_APEX_THRESHOLD", "1") == "1"
+        self.threshold_controller = ThresholdController(ControllerConfig(
+            min_threshold=float(os.getenv("APEX_THRESHOLD_MIN", "5.0")),
+            max_threshold=float(os.getenv("APEX_THRESHOLD_MAX", "9.5")),
+            apex_budget_per_hour=float(os.getenv("APEX_BUDGET_PER_HOUR", "5.0")),
+            apex_cost_per_request=float(os.getenv("APEX_COST_PER_REQUEST", "0.0008")),
+        ))
+
+    def route(self, pressure: float) -> str:
+        if self.adaptive_threshold:
+            now = time.monotonic()
+            pool = self.local_pool.metrics()
+            self.threshold_controller.update(
+                now,
+                local_outstanding=pool["local_outstanding_requests"],
+                local_capacity=max(pool["local_endpoints_healthy"], 1) * self.local_slots,
+                apex_throttled=self.apex_limiter.blocked_until > now,
+            )
+        return route_tier(pressure, bool(self.apex_key), self.threshold_controller.threshold)
+
+    async def generate(self, state, prompt: list, tier: str = None) -> str:
+        # Generation must finish inside the debater's remaining rebuttal window
+        # An expired timer (0 or negative) still sets a deadline, which caps length at the floor
+        timer = state.last_rebuttal_timer
+        deadline = None if timer is None else time.monotonic() + timer
 
-    async def generate(self, state, prompt: list) -> str:
         # Pressure Check
-        is_high_pressure = state.pressure_score > 7.2
-        
-        if is_high_pressure and self.apex_key:
-            return await self._call_apex(prompt)
+        if (tier or self.route(state.pressure_score)) == "APEX_CLOUD":
+            return await self._call_apex(prompt, deadline)
         
-        return await self._call_local(prompt)
+        return await self._call_local(prompt, deadline)
 
-    async def _call_local(self, messages: list) -> str:
+    async def _call_local(self, messages: list, deadline: float = None) -> str:
+        max_tokens = self.local_speed.max_tokens(_remaining(deadline), ceiling=512)
+        payload = {"model": "Qwen/Qwen2.5-14B-Instruct", "messages": messages, "max_tokens": max_tokens}
+        stop = stop_sequences(max_tokens, 512)
+        if stop:
+            payload["stop"] = stop
         try:
-            resp = await self.client.post(
-                self.local_endpoint,
-                json={"model": "Qwen/Qwen2.5-14B-Instruct", "messages": messages, "max_tokens": 512}
-            )
-            return resp.json()["choices"][0]["message"]["content"]
+            started = time.perf_counter()
+            resp = await self.local_pool.post(self.client, json=payload)
+            latency = time.perf_counter() - started
+            text = _completion_text(resp.json(), self.local_speed, latency)
+            self.threshold_controller.observe_turn("LOCAL_WARM", latency, _remaining(deadline, latency))
+            return text
         except Exception as e:
             print(f"Local Brain Fail: {e}")
             return "My local processes are stalling. One moment."
 
-    async def _call_apex(self, messages: list) -> str:
+    async def _call_apex(self, messages: list, deadline: float = None) -> str:
+        headers = {"Authorization": f"Bearer {self.apex_key}"}
+        max_tokens = self.apex_speed.max_tokens(_remaining(deadline), ceiling=1024)
+
+        # Decide before sending: apex now, apex after a short wait, or local
+        reserved = estimate_tokens(messages, max_tokens)
+        delay = self.apex_limiter.reserve(reserved)
+        if delay is None:
+            return await self._call_local(messages, deadline)
+        if delay > 0 and deadline is not None:
+            # The queue wait comes out of the rebuttal window, so size the reply for what is left after it
+            max_tokens = self.apex_speed.max_tokens(_remaining(deadline) - delay, ceiling=1024)
+            reserved = self.apex_limiter.resize(reserved, estimate_tokens(messages, max_tokens))
+
         payload = {
             "model": "llama-3.3-70b-versatile",
             "messages": messages,
             "temperature": 0.7,
-            "max_tokens": 1024
+            "max_tokens": max_tokens
         }
-        headers = {"Authorization": f"Bearer {self.apex_key}"}
+        stop = stop_sequences(max_tokens, 1024)
+        if stop:
+            payload["stop"] = stop
+
         try:
-            resp = await self.client.post(self.apex_url, json=payload, headers=headers)
-            return resp.json()["choices"][0]["message"]["content"]
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                started = time.perf_counter()
+                resp = await self.client.post(self.apex_url, json=payload, headers=headers)
+            finally:
+                # Released before the header sync below, which already counts this request
+                self.apex_limiter.release(reserved)
+            if resp.status_code == 429:
+                self.apex_limiter.on_throttled(resp.headers)
+                return await self._call_local(messages, deadline)
+            self.apex_limiter.update_from_headers(resp.headers)
+            resp.raise_for_status()
+            data = resp.json()
+            self.apex_limiter.reconcile(reserved, data.get("usage", {}).get("total_tokens"), resp.headers)
+            latency = time.perf_counter() - started
+            text = _completion_text(data, self.apex_speed, latency)
+            self.threshold_controller.observe_turn("APEX_CLOUD", latency, _remaining(deadline, latency))
+            return text
         except Exception:
             # Fallback to local if Cloud fails
-            return await self._call_local(messages)
\ No newline at end of file
+            return await self._call_local(messages, deadline)
+
+
+def _remaining(deadline: float = None, elapsed: float = 0.0):
+    # With `elapsed`, the window as it stood when the request was sent
+    return None if deadline is None else deadline - time.monotonic() + elapsed
+
+
+def _completion_text(data: dict, speed: ThroughputEstimator, latency: float) -> str:
+    speed.observe(latency, data.get("usage", {}).get("completion_tokens"))
+    choice = data["choices"][0]
+    text = choice["message"]["content"]
+    if choice.get("finish_reason") == "length":
+        text = trim_to_sentence(text)
+    return text
@@ -0,0 +1,44 @@
+import re
+from typing import Optional
+
+# When length is capped, stop at a paragraph break rather than starting a new point
+STOP_SEQUENCES = ["\n\n"]
+SENTENCE_END = re.compile(r'[.!?]["\')\]]?(?=\s|$)')
+
+
+class ThroughputEstimator:
+    """Running tokens-per-second estimate for one tier, used to size max_tokens."""
+
+    def __init__(self, tokens_per_second: float, overhead: float, alpha: float = 0.2):
+        self.tokens_per_second = tokens_per_second
+        # Queueing + prefill + network time that does not scale with output length
+        self.overhead = overhead
+        self.alpha = alpha
+
+    def observe(self, latency: float, completion_tokens: Optional[int]):
+        if not completion_tokens:
+            return
+        generating = max(latency - self.overhead, 0.05)
+        sample = completion_tokens / generating
+        self.tokens_per_second += self.alpha * (sample - self.tokens_per_second)
+
+    def max_tokens(self, remaining: Optional[float], ceiling: int, floor: int = 48, safety: float = 0.8) -> int:
+        """Token cap for the remaining window; an expired window gets `floor`, no timer gets `ceiling`."""
+        if remaining is None:
+            return ceiling
+        budget = (remaining - self.overhead) * self.tokens_per_second * safety
+        return int(min(max(budget, floor), ceiling))
+
+
+def stop_sequences(max_tokens: int, ceiling: int) -> Optional[list]:
+    # Uncapped replies keep their paragraphs (list-style rebuttals)
+    return STOP_SEQUENCES if max_tokens < ceiling else None
+
+
+def trim_to_sentence(text: str) -> str:
+    """Drop a trailing partial sentence left by a length-capped generation."""
+    ends = [m.end() for m in SENTENCE_END.finditer(text)]
+    # Keep the raw text if trimming would throw most of it away
+    if not ends or ends[-1] < len(text) * 0.4:
+        return text
+    return text[:ends[-1]]
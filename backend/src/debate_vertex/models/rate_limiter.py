@@ -0,0 +1,173 @@
+import re
+import time
+from typing import Mapping, Optional
+
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_SCALE = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse provider reset durations such as '7.66s', '2m59.56s' or '120ms' into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * DURATION_SCALE[unit] for n, unit in parts)
+
+
+def estimate_tokens(messages: list, max_tokens: int) -> int:
+    # ~4 characters per token is close enough to reserve budget before sending
+    chars = sum(len(m.get("content", "")) for m in messages)
+    return chars // 4 + max_tokens
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        # Configured per-minute budget; provider headers may tighten it but never widen it
+        self.max_capacity = capacity
+        self.max_rate = self.rate
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than the whole bucket only needs it full
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate > 0 else float("inf")
+
+    def consume(self, amount: float):
+        # Level may go negative: later callers then wait for this reservation too
+        self.level -= amount
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float], now: float,
+             outstanding: float = 0.0):
+        """Adopt the provider's view, less reservations it has not seen yet (`outstanding`)."""
+        self._refill(now)
+        # Groq reports the per-day request limit here; a window wider than our
+        # per-minute budget can only tighten the bucket, never refill it
+        wider_window = bool(limit) and limit > self.max_capacity
+        if limit:
+            self.capacity = min(limit, self.max_capacity)
+        if remaining is not None:
+            if wider_window:
+                self.level = min(self.level, remaining - outstanding)
+            else:
+                self.level = min(remaining - outstanding, self.capacity)
+                if reset and self.capacity > remaining:
+                    self.rate = min((self.capacity - remaining) / reset, self.max_rate)
+
+
+class ApexRateLimiter:
+    """Client-side request and token budget for the apex tier.
+
+    Budgets start from the configured per-minute limits and are corrected by
+    the provider's x-ratelimit-* headers after every response.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_queue_wait: float = 1.0):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute)
+        self.max_queue_wait = max_queue_wait
+        self.blocked_until = 0.0
+        # Reserved for requests still in flight, which the provider's remaining counts do not include yet
+        self.outstanding_requests = 0
+        self.outstanding_tokens = 0
+        self.decisions = {"apex": 0, "queued": 0, "local": 0, "throttled": 0}
+
+    def reserve(self, tokens: int) -> Optional[float]:
+        """Reserve budget for one request.
+
+        Returns the delay to wait before sending, or None when the request
+        should be served locally instead.
+        """
+        now = time.monotonic()
+        wait = max(
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+            self.blocked_until - now,
+        )
+        if wait > self.max_queue_wait:
+            self.decisions["local"] += 1
+            return None
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        self.outstanding_requests += 1
+        self.outstanding_tokens += tokens
+        self.decisions["queued" if wait > 0 else "apex"] += 1
+        return max(wait, 0.0)
+
+    def resize(self, reserved: int, tokens: int) -> int:
+        """Change an admitted reservation from `reserved` to `tokens` tokens."""
+        self.tokens.consume(tokens - reserved)
+        self.outstanding_tokens += tokens - reserved
+        return tokens
+
+    def release(self, tokens: int):
+        """Mark a reserved request as finished (answered, throttled or failed).
+
+        Call before syncing that response's headers: from then on the
+        provider's remaining counts account for it.
+        """
+        self.outstanding_requests = max(self.outstanding_requests - 1, 0)
+        self.outstanding_tokens = max(self.outstanding_tokens - tokens, 0)
+
+    def reconcile(self, reserved: int, used: Optional[int], headers: Mapping[str, str]):
+        # The provider's remaining-tokens header already reflects actual usage
+        if used is None or "x-ratelimit-remaining-tokens" in headers:
+            return
+        self.tokens.level = min(self.tokens.capacity, self.tokens.level + reserved - used)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        now = time.monotonic()
+        self.requests.sync(
+            _number(headers.get("x-ratelimit-limit-requests")),
+            _number(headers.get("x-ratelimit-remaining-requests")),
+            parse_reset(headers.get("x-ratelimit-reset-requests")),
+            now,
+            self.outstanding_requests,
+        )
+        self.tokens.sync(
+            _number(headers.get("x-ratelimit-limit-tokens")),
+            _number(headers.get("x-ratelimit-remaining-tokens")),
+            parse_reset(headers.get("x-ratelimit-reset-tokens")),
+            now,
+            self.outstanding_tokens,
+        )
+
+    def on_throttled(self, headers: Mapping[str, str]):
+        self.decisions["throttled"] += 1
+        self.update_from_headers(headers)
+        retry_after = parse_reset(headers.get("retry-after")) or 1.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return {
+            "apex_remaining_requests": max(self.requests.level, 0.0),
+            "apex_remaining_tokens": max(self.tokens.level, 0.0),
+            "apex_blocked_seconds": max(self.blocked_until - now, 0.0),
+            **{f"apex_decisions_{k}_total": v for k, v in self.decisions.items()},
+        }
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,99 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+APEX_THRESHOLD = 7.2
+
+
+class ControllerConfig(BaseModel):
+    baseline: float = APEX_THRESHOLD
+    min_threshold: float = 5.0
+    max_threshold: float = 9.5
+    interval: float = 5.0
+    gain: float = 0.5
+    # Pull back toward the baseline when neither tier is under strain
+    restore: float = 0.05
+    # Objectives
+    local_target_utilisation: float = 0.8
+    apex_latency_target: float = 2.0
+    apex_budget_per_hour: float = 5.0
+    apex_cost_per_request: float = 0.0008
+    target_miss_rate: float = 0.05
+    # How much timer misses above target amplify each correction
+    miss_weight: float = 10.0
+    alpha: float = 0.2
+
+
+class ThresholdController:
+    """Online tuning of the APEX_CLOUD pressure threshold.
+
+    Every `interval` seconds the threshold moves down (more traffic to apex)
+    when the local pool is saturated, and up (more traffic stays local) when
+    apex is slow, throttled or over budget. The apex latency estimate decays
+    toward its target in intervals without apex turns, so a threshold pushed
+    to the maximum can recover. A timer-miss rate above target
+    scales the correction. Per-tier miss rates are reported but not steered
+    on: apex turns are the short-timer ones, so they miss more by selection.
+    Callers pass `now` so the same controller runs against wall-clock time in
+    production and simulated time in `core.simulator`.
+    """
+
+    def __init__(self, config: Optional[ControllerConfig] = None):
+        self.config = config or ControllerConfig()
+        self.threshold = self.config.baseline
+        self.apex_latency = self.config.apex_latency_target
+        self.miss_rate = {"LOCAL_WARM": 0.0, "APEX_CLOUD": 0.0}
+        self.overall_miss_rate = 0.0
+        self.apex_spend_rate = 0.0
+        self._apex_requests = 0
+        self._last_update = None
+
+    def observe_turn(self, tier: str, latency: float, timer: Optional[float] = None):
+        a = self.config.alpha
+        if tier == "APEX_CLOUD":
+            self._apex_requests += 1
+            self.apex_latency += a * (latency - self.apex_latency)
+        if timer is not None and timer > 0 and tier in self.miss_rate:
+            missed = 1.0 if latency > timer else 0.0
+            self.miss_rate[tier] += a * (missed - self.miss_rate[tier])
+            self.overall_miss_rate += a * (missed - self.overall_miss_rate)
+
+    def update(self, now: float, local_outstanding: float, local_capacity: float,
+               apex_throttled: bool = False) -> float:
+        if self._last_update is None:
+            self._last_update = now
+            return self.threshold
+        elapsed = now - self._last_update
+        if elapsed < self.config.interval:
+            return self.threshold
+        self._last_update = now
+
+        c = self.config
+        self.apex_spend_rate = self._apex_requests * c.apex_cost_per_request * 3600.0 / elapsed
+        if self._apex_requests == 0:
+            # No fresh samples: let a past slowdown fade rather than pin the threshold high
+            self.apex_latency += c.alpha * (c.apex_latency_target - self.apex_latency)
+        self._apex_requests = 0
+
+        utilisation = local_outstanding / max(local_capacity, 1.0)
+        local_strain = max(utilisation - c.local_target_utilisation, 0.0)
+        apex_strain = (
+            max(self.apex_latency / c.apex_latency_target - 1.0, 0.0)
+            + max(self.apex_spend_rate / c.apex_budget_per_hour - 1.0, 0.0)
+            + (1.0 if apex_throttled else 0.0)
+        )
+        urgency = 1.0 + c.miss_weight * max(self.overall_miss_rate - c.target_miss_rate, 0.0)
+
+        self.threshold += c.gain * urgency * (apex_strain - local_strain) + c.restore * (c.baseline - self.threshold)
+        self.threshold = min(max(self.threshold, c.min_threshold), c.max_threshold)
+        return self.threshold
+
+    def metrics(self) -> dict:
+        return {
+            "apex_threshold": self.threshold,
+            "apex_latency_ewma_seconds": self.apex_latency,
+            "apex_spend_per_hour": self.apex_spend_rate,
+            "local_timer_miss_rate": self.miss_rate["LOCAL_WARM"],
+            "apex_timer_miss_rate": self.miss_rate["APEX_CLOUD"],
+            "timer_miss_rate": self.overall_miss_rate,
+        }
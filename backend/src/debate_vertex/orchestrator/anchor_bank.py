@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+DEFAULT_ANCHORS_PATH = Path(__file__).with_name("tension_anchors.json")
+# Original single-anchor scale: similarity 0.2 scores 0 and 0.6 scores 10
+DEFAULT_FLOOR = 0.2
+DEFAULT_SPAN = 0.4
+NEUTRAL_PERCENTILE = 95
+
+
+class AnchorBank:
+    """Categorised tension anchors as one contiguous, L2-normalised float32 matrix.
+
+    Anchors are grouped by category, so a single matrix-vector product scores
+    every anchor and `offsets` slices the result back into categories.
+
+    `scale` maps similarities to 0-10 per category. The floor is the
+    95th-percentile best match of the spec's neutral sentences (so ordinary
+    debate talk scores 0 however many anchors a category has) and the ceiling
+    is the median similarity of each anchor to its nearest sibling (so a
+    paraphrase of an anchor scores 10).
+    """
+
+    def __init__(self, categories: list, weights: np.ndarray, matrix: np.ndarray, offsets: np.ndarray,
+                 floors: Optional[np.ndarray] = None, ceilings: Optional[np.ndarray] = None):
+        self.categories = categories
+        self.weights = weights
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.offsets = offsets
+        self.sizes = np.diff(np.append(offsets, len(matrix)))
+        n = len(categories)
+        self.floors = np.full(n, DEFAULT_FLOOR, dtype=np.float32) if floors is None else floors
+        self.ceilings = self.floors + DEFAULT_SPAN if ceilings is None else ceilings
+
+    @classmethod
+    def from_spec(cls, spec: dict, encode: Callable[[list], np.ndarray],
+                  cache_dir: Optional[str] = None, cache_key: str = "") -> "AnchorBank":
+        neutral = spec.get("calibration", {}).get("neutral", [])
+        categories, weights, phrases, offsets = [], [], [], []
+        for name, entry in spec.get("categories", spec).items():
+            if not entry["anchors"]:
+                continue
+            categories.append(name)
+            weights.append(float(entry.get("weight", 1.0)))
+            offsets.append(len(phrases))
+            phrases.extend(entry["anchors"])
+
+        matrix = None
+        cache_path = None
+        if cache_dir:
+            digest = hashlib.sha1((cache_key + json.dumps([phrases, neutral])).encode("utf-8")).hexdigest()
+            cache_path = Path(cache_dir) / f"anchors-{digest}.npy"
+            try:
+                matrix = np.load(cache_path) if cache_path.exists() else None
+            except (OSError, ValueError):
+                matrix = None
+        if matrix is None:
+            matrix = np.asarray(encode(phrases + neutral), dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+            if cache_path is not None:
+                # A read-only or full cache dir only costs a re-encode next start
+                try:
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    np.save(cache_path, matrix)
+                except OSError:
+                    pass
+
+        offsets = np.asarray(offsets, dtype=np.intp)
+        anchors, neutral_matrix = matrix[:len(phrases)], matrix[len(phrases):]
+        floors, ceilings = _calibrate(anchors, neutral_matrix, offsets)
+        return cls(categories, np.asarray(weights, dtype=np.float32), anchors, offsets, floors, ceilings)
+
+    @classmethod
+    def load(cls, model, model_name: str, path: Optional[str] = None) -> "AnchorBank":
+        path = Path(path or os.getenv("TENSION_ANCHORS_PATH") or DEFAULT_ANCHORS_PATH)
+        spec = json.loads(path.read_text())
+        cache_dir = os.getenv("TENSION_ANCHOR_CACHE", os.path.join(tempfile.gettempdir(), "debate-vertex-anchors"))
+        encode = lambda phrases: model.encode(phrases, convert_to_numpy=True, normalize_embeddings=True)
+        return cls.from_spec(spec, encode, cache_dir=cache_dir, cache_key=model_name)
+
+    def similarities(self, embedding: np.ndarray, top_k: int = 1) -> np.ndarray:
+        """Mean cosine similarity of the top-k anchors in each category."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+        sims = self.matrix @ query
+        if top_k == 1:
+            return np.maximum.reduceat(sims, self.offsets)
+        out = np.empty(len(self.categories), dtype=np.float32)
+        for i, (start, size) in enumerate(zip(self.offsets, self.sizes)):
+            chunk = sims[start:start + size]
+            k = min(top_k, size)
+            out[i] = np.partition(chunk, size - k)[size - k:].mean()
+        return out
+
+    def scale(self, similarities: np.ndarray) -> np.ndarray:
+        """Per-category tension on a 0-10 scale."""
+        return np.clip((similarities - self.floors) / (self.ceilings - self.floors) * 10.0, 0.0, 10.0)
+
+    def score(self, embedding: np.ndarray, top_k: int = 1) -> Dict[str, float]:
+        return dict(zip(self.categories, self.similarities(embedding, top_k).tolist()))
+
+
+def _calibrate(anchors: np.ndarray, neutral: np.ndarray, offsets: np.ndarray):
+    sizes = np.diff(np.append(offsets, len(anchors)))
+    floors = np.full(len(offsets), DEFAULT_FLOOR, dtype=np.float32)
+    if len(neutral):
+        best = np.maximum.reduceat(neutral @ anchors.T, offsets, axis=1)
+        floors = np.maximum(np.percentile(best, NEUTRAL_PERCENTILE, axis=0), DEFAULT_FLOOR).astype(np.float32)
+
+    ceilings = floors + DEFAULT_SPAN
+    for i, (start, size) in enumerate(zip(offsets, sizes)):
+        if size < 2:
+            continue
+        block = anchors[start:start + size]
+        sims = block @ block.T
+        np.fill_diagonal(sims, -np.inf)
+        ceilings[i] = np.median(sims.max(axis=1))
+    # Keep a usable span when anchors sit barely above the neutral floor
+    return floors, np.maximum(ceilings, floors + DEFAULT_SPAN / 2).astype(np.float32)
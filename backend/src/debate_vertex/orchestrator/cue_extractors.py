@@ -5,7 +5,7 @@ TOKEN_PATTERN = re.compile(r'\w+')
 ASSERTIVE_VERBS = {"is", "are", "must", "should", "cannot", "prove", "proves"}
 MODALS = {"always", "never", "only", "necessarily", "impossible", "obviously"}
 DEPTH_TRIGGERS = {"because", "since", "therefore", "implies", "means", "consequently"}
-TENSION_ANCHORS = ["You are wrong", "That is a fallacy", "Evidence contradicts", "I disagree"]
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 
 class SemanticTensionSensor:
     @classmethod
@@ -13,24 +13,36 @@ class SemanticTensionSensor:
     def get_sensor(cls):
         try:
             from sentence_transformers import SentenceTransformer
+            from .anchor_bank import AnchorBank
             # Fast, quantized CPU model
-            model = SentenceTransformer('all-MiniLM-L6-v2')
-            anchors_emb = model.encode(TENSION_ANCHORS, convert_to_tensor=True)
-            return model, anchors_emb
+            model = SentenceTransformer(EMBEDDING_MODEL)
+            bank = AnchorBank.load(model, EMBEDDING_MODEL)
+            return model, bank
         except Exception:
             return None, None
 
+    @classmethod
+    def measure_categories(cls, text: str, top_k: int = 1) -> dict:
+        """Per-category tension scores (0-10) against the anchor bank."""
+        model, bank = cls.get_sensor()
+        if model is None or len(text) < 10: return {}
+        
+        try:
+            emb = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+            scores = bank.scale(bank.similarities(emb, top_k))
+            return dict(zip(bank.categories, scores.tolist()))
+        except:
+            return {}
+
     @classmethod
     def measure(cls, text: str) -> float:
-        model, anchors = cls.get_sensor()
+        model, bank = cls.get_sensor()
         if model is None or len(text) < 10: return 0.0
         
         try:
-            from sentence_transformers import util
-            emb = model.encode(text, convert_to_tensor=True)
-            scores = util.cos_sim(emb, anchors)
-            # Scale max similarity (0.3 is high here) to 0-10
-            return min(max(0, (float(scores.max()) - 0.2) * 25), 10.0)
+            emb = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+            # Weighted so tension-reducing categories (concession) never raise pressure
+            return float((bank.scale(bank.similarities(emb)) * bank.weights).max())
         except:
             return 0.0
 
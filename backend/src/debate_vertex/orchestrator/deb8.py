@@ -1,48 +1,129 @@
+import asyncio
+import contextlib
+import os
+import tempfile
 import time
 import uuid
 from fastapi import WebSocket
+from ..core.transcript import TranscriptLog, turn_record
 from ..models.brain_router import HybridBrain
 from .cue_extractors import estimate_debate_pressure
+from .sessions import SessionStore
 from .state import DebateState
 
 class DebateManager:
     def __init__(self):
+        # websocket -> session_id; the DebateState itself lives in self.sessions
         self.active_connections = {}
         self.brain = HybridBrain()
+        transcript_dir = os.getenv("TRANSCRIPT_DIR")
+        self.transcript = TranscriptLog(transcript_dir) if transcript_dir else None
+        snapshot_root = os.getenv("SESSION_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "debate-vertex-sessions"))
+        self.sessions = SessionStore(
+            # One directory per worker process so workers never clear each other's snapshots
+            os.path.join(snapshot_root, str(os.getpid())),
+            max_resident=int(os.getenv("MAX_RESIDENT_SESSIONS", "5000")),
+            max_resident_bytes=int(os.getenv("MAX_RESIDENT_SESSION_MB", "256")) * 1024 * 1024,
+            idle_seconds=float(os.getenv("SESSION_IDLE_SECONDS", "300")),
+        )
+        self.heartbeat_interval = float(os.getenv("HEARTBEAT_INTERVAL", "30"))
+        # Sockets silent for this many heartbeats are treated as half-open and closed
+        self.heartbeat_misses = int(os.getenv("HEARTBEAT_MISSES", "3"))
+        # websocket -> monotonic time of the last message (pong or turn) received
+        self.last_seen = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         session_id = str(uuid.uuid4())
-        self.active_connections[websocket] = DebateState(session_id=session_id)
+        await self.sessions.add(DebateState(session_id=session_id))
+        self.active_connections[websocket] = session_id
+        self.last_seen[websocket] = time.monotonic()
         print(f"Session {session_id} connected.")
 
     def disconnect(self, websocket: WebSocket):
+        self.last_seen.pop(websocket, None)
         if websocket in self.active_connections:
-            del self.active_connections[websocket]
+            self.sessions.remove(self.active_connections.pop(websocket))
+
+    async def run_heartbeat(self):
+        """Hibernate idle sessions and ping every socket so dead tabs get cleaned up."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await self.sessions.hibernate_idle()
+            await self.check_heartbeats()
+
+    async def check_heartbeats(self, now: float = None):
+        now = now or time.monotonic()
+        deadline = self.heartbeat_interval * self.heartbeat_misses
+        await asyncio.gather(*(
+            self._ping(websocket, now - self.last_seen.get(websocket, now) > deadline)
+            for websocket in list(self.active_connections)
+        ))
+
+    async def _ping(self, websocket: WebSocket, expired: bool):
+        # A half-open socket accepts sends without error, so missing pongs are the only signal
+        if expired:
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(websocket.close(code=1001), timeout=self.heartbeat_interval)
+            self.disconnect(websocket)
+            return
+        try:
+            await asyncio.wait_for(websocket.send_json({"type": "ping"}), timeout=self.heartbeat_interval)
+        except Exception:
+            self.disconnect(websocket)
+
+    def _record(self, state: DebateState, role: str, text: str, tier: str,
+                latency_ms: float = None, timer: float = None):
+        if self.transcript is None:
+            return
+        self.transcript.append(turn_record(
+            state.session_id, state.turn_count, role, text,
+            state.pressure_score, tier, latency_ms, timer
+        ))
 
     async def process_message(self, websocket: WebSocket, data: dict):
-        state = self.active_connections[websocket]
+        session_id = self.active_connections.get(websocket)
+        if session_id is None:
+            # Closed by the heartbeat while this message was in flight
+            return
+        self.last_seen[websocket] = time.monotonic()
+        if data.get("type") == "pong":
+            # Liveness only; does not count as debate activity
+            return
+        state = await self.sessions.acquire(session_id)
+        try:
+            await self._take_turn(websocket, state, data)
+        finally:
+            await self.sessions.release(session_id)
+
+    async def _take_turn(self, websocket: WebSocket, state: DebateState, data: dict):
         user_text = data.get("text", "")
-        timer_remaining = data.get("timer", 30.0)
+        timer_remaining = data.get("timer")
         
         # 1. Update State
         state.last_rebuttal_timer = timer_remaining
         state.add_turn("user", user_text)
         
         # 2. Analyze Pressure (The Nervous System)
-        pressure = estimate_debate_pressure(user_text, timer_remaining)
+        pressure = estimate_debate_pressure(user_text, 30.0 if timer_remaining is None else timer_remaining)
         state.pressure_score = pressure
         
+        tier = self.brain.route(pressure)
+        self._record(state, "user", user_text, tier, timer=timer_remaining)
+        
         # 3. Stream Thinking Status
         await websocket.send_json({
             "type": "status", 
             "pressure": pressure,
-            "tier": "APEX_CLOUD" if pressure > 7.2 else "LOCAL_WARM"
+            "tier": tier
         })
         
         # 4. Generate Response (The Brain)
-        response_text = await self.brain.generate(state, state.get_context())
+        started = time.perf_counter()
+        response_text = await self.brain.generate(state, state.get_context(), tier)
+        latency_ms = (time.perf_counter() - started) * 1000
         state.add_turn("assistant", response_text)
+        self._record(state, "assistant", response_text, tier, latency_ms)
         
         # 5. Send Response
         await websocket.send_json({
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from .state import DebateState
+
+SNAPSHOT_SUFFIX = ".snap"
+
+
+class SessionStore:
+    """Resident DebateStates with LRU hibernation to compressed on-disk snapshots.
+
+    Resident sessions are kept coldest-first. Idle sessions, and the coldest
+    ones whenever the count or byte caps are exceeded, are written to
+    `snapshot_dir` and dropped from memory; `acquire` restores them transparently.
+    Sessions pinned by an in-flight turn are never hibernated. Snapshot
+    compression and file I/O run in worker threads, and a session acquired
+    while its snapshot is still being written is taken back from memory.
+    """
+
+    def __init__(self, snapshot_dir: str, max_resident: int = 5000,
+                 max_resident_bytes: int = 256 * 1024 * 1024, idle_seconds: float = 300.0):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        # Session ids are per-connection, so snapshots from a previous process are orphans
+        for stale in self.snapshot_dir.glob("*" + SNAPSHOT_SUFFIX):
+            stale.unlink()
+        self.max_resident = max_resident
+        self.max_resident_bytes = max_resident_bytes
+        self.idle_seconds = idle_seconds
+
+        self.resident: "OrderedDict[str, DebateState]" = OrderedDict()
+        self.hibernated = set()
+        self.resident_bytes = 0
+        self._sizes = {}
+        self._pinned = set()
+        # Sessions whose snapshot write is in flight; None once reacquired or removed
+        self._flushing = {}
+
+    async def add(self, state: DebateState):
+        self.resident[state.session_id] = state
+        self._account(state)
+        await self.enforce_caps()
+
+    async def acquire(self, session_id: str) -> DebateState:
+        """Return the session for an incoming turn, restoring it if hibernated, and pin it."""
+        # Pin first so nothing hibernates it while a restore is awaited
+        self._pinned.add(session_id)
+        state = self.resident.get(session_id)
+        if state is None:
+            state = self._flushing.get(session_id)
+            if state is not None:
+                # Snapshot still being written: take the in-memory copy back
+                self._flushing[session_id] = None
+                self.resident[session_id] = state
+                self._account(state)
+            else:
+                state = await self._restore(session_id)
+        if session_id in self.resident:
+            self.resident.move_to_end(session_id)
+        return state
+
+    async def release(self, session_id: str):
+        self._pinned.discard(session_id)
+        state = self.resident.get(session_id)
+        if state is not None:
+            state.last_active = time.time()
+            self._account(state)
+        await self.enforce_caps()
+
+    def remove(self, session_id: str):
+        self._pinned.discard(session_id)
+        if self.resident.pop(session_id, None) is not None:
+            self.resident_bytes -= self._sizes.pop(session_id, 0)
+        if session_id in self._flushing:
+            # The in-flight write deletes its snapshot when it finishes
+            self._flushing[session_id] = None
+        if session_id in self.hibernated:
+            self.hibernated.discard(session_id)
+            self._path(session_id).unlink(missing_ok=True)
+
+    async def hibernate(self, session_id: str) -> bool:
+        if session_id in self._pinned or session_id in self._flushing or session_id not in self.resident:
+            return False
+        state = self.resident.pop(session_id)
+        self.resident_bytes -= self._sizes.pop(session_id, 0)
+        self._flushing[session_id] = state
+        path = self._path(session_id)
+        try:
+            # Compression and disk writes stay off the event loop
+            await asyncio.to_thread(_write_snapshot, path, state.model_dump_json())
+        except OSError as e:
+            print(f"Session hibernate failed: {e}")
+            if self._flushing.pop(session_id, None) is not None:
+                self.resident[session_id] = state
+                self.resident.move_to_end(session_id, last=False)
+                self._account(state)
+            return False
+        if self._flushing.pop(session_id, None) is None:
+            # Reacquired or removed while the snapshot was being written
+            path.unlink(missing_ok=True)
+            return False
+        self.hibernated.add(session_id)
+        return True
+
+    async def hibernate_idle(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        cutoff = now - self.idle_seconds
+        idle = []
+        # Coldest first, so stop at the first session that is still warm
+        for session_id, state in self.resident.items():
+            if state.last_active > cutoff:
+                break
+            idle.append(session_id)
+        return sum(await asyncio.gather(*(self.hibernate(s) for s in idle)))
+
+    async def enforce_caps(self):
+        count, size = len(self.resident), self.resident_bytes
+        victims = []
+        for session_id in self.resident:
+            if count <= self.max_resident and size <= self.max_resident_bytes:
+                break
+            if session_id in self._pinned:
+                continue
+            victims.append(session_id)
+            count -= 1
+            size -= self._sizes.get(session_id, 0)
+        await asyncio.gather(*(self.hibernate(s) for s in victims))
+
+    def metrics(self) -> dict:
+        return {
+            "sessions_resident": len(self.resident),
+            "sessions_hibernated": len(self.hibernated),
+            "sessions_resident_bytes": self.resident_bytes,
+        }
+
+    async def _restore(self, session_id: str) -> DebateState:
+        state = await asyncio.to_thread(_read_snapshot, self._path(session_id))
+        if session_id not in self.hibernated:
+            # Removed while the snapshot was being read
+            return state
+        self.hibernated.discard(session_id)
+        self.resident[session_id] = state
+        self._account(state)
+        return state
+
+    def _account(self, state: DebateState):
+        size = state.memory_bytes()
+        self.resident_bytes += size - self._sizes.get(state.session_id, 0)
+        self._sizes[state.session_id] = size
+
+    def _path(self, session_id: str) -> Path:
+        return self.snapshot_dir / (session_id + SNAPSHOT_SUFFIX)
+
+
+def _write_snapshot(path: Path, payload: str):
+    path.write_bytes(zlib.compress(payload.encode("utf-8")))
+
+
+def _read_snapshot(path: Path) -> DebateState:
+    state = DebateState.model_validate_json(zlib.decompress(path.read_bytes()))
+    path.unlink()
+    return state
@@ -1,17 +1,29 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+import sys
 import time
 
+# Fixed cost of the model instance plus one {"role", "content"} dict per turn
+STATE_OVERHEAD_BYTES = 1024
+TURN_OVERHEAD_BYTES = sys.getsizeof({"role": "", "content": ""}) + 64
+
 class DebateState(BaseModel):
     session_id: str
     history: List[dict] = []
-    last_rebuttal_timer: float = 0.0
+    # None until the client sends a timer; generation is uncapped without one
+    last_rebuttal_timer: Optional[float] = None
     pressure_score: float = 0.0
     turn_count: int = 0
+    history_bytes: int = 0
+    last_active: float = Field(default_factory=time.time)
     
     def add_turn(self, role: str, content: str):
         self.history.append({"role": role, "content": content})
         self.turn_count += 1
+        self.history_bytes += sys.getsizeof(content) + TURN_OVERHEAD_BYTES
+        
+    def memory_bytes(self) -> int:
+        return STATE_OVERHEAD_BYTES + self.history_bytes
         
     def get_context(self, limit: int = 10) -> List[dict]:
         return self.history[-limit:]
\ No newline at end of file
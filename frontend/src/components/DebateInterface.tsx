@@ -21,6 +21,8 @@ export default function DebateInterface() {
       } else if (data.type === 'status') {
         setPressure(data.pressure);
         setTier(data.tier);
+      } else if (data.type === 'ping') {
+        ws.send(JSON.stringify({ type: 'pong' }));
       }
     };
     setSocket(ws);
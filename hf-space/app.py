@@ -1,6 +1,34 @@
 import streamlit as st
-import time
+import json
+import os
 import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# The Space ships a copy of backend/src/debate_vertex next to app.py; in the repo it lives under backend/src
+APP_DIR = Path(__file__).resolve().parent
+for candidate in (APP_DIR, APP_DIR.parent / "backend" / "src"):
+    if (candidate / "debate_vertex").is_dir():
+        # Streamlit re-runs this script on every interaction
+        if str(candidate) not in sys.path:
+            sys.path.insert(0, str(candidate))
+        break
+
+from debate_vertex.orchestrator.cue_extractors import SemanticTensionSensor, estimate_debate_pressure
+from debate_vertex.models.brain_router import route_tier
+
+# Optional OpenAI-compatible backend; without it responses stream from the local mock
+LLM_URL = os.getenv("DEMO_LLM_URL")
+LLM_KEY = os.getenv("DEMO_LLM_KEY")
+LLM_MODEL = os.getenv("DEMO_LLM_MODEL", "llama-3.3-70b-versatile")
+SYSTEM_PROMPT = (
+    "You are a sharp debate sparring partner arguing that AI is more beneficial than dangerous "
+    "to humanity. Rebut the user's latest argument in at most four sentences."
+)
 
 # Page configuration
 st.set_page_config(
@@ -9,48 +37,31 @@ st.set_page_config(
     layout="wide"
 )
 
-# Pressure estimation algorithm
-def estimate_pressure(message: str, turn_number: int) -> float:
-    """Calculate debate pressure on a 0-10 scale"""
-    pressure = 0.0
-    
-    # Assertive language (+1.5 per instance)
-    assertive_words = ["must", "should", "never", "always", "clearly", "obviously", "definitely"]
-    pressure += sum(1.5 for word in assertive_words if word.lower() in message.lower())
-    
-    # Tension anchors (+1.0 per instance)
-    tension_words = ["but", "however", "wrong", "dangerous", "threat", "risk", "fear", "disaster"]
-    pressure += sum(1.0 for word in tension_words if word.lower() in message.lower())
-    
-    # Exclamation marks (+0.5 per instance)
-    pressure += message.count("!") * 0.5
-    
-    # Question marks (challenging) (+0.3 per instance)
-    pressure += message.count("?") * 0.3
-    
-    # Turn escalation (debates naturally intensify)
-    pressure += turn_number * 0.3
-    
-    # Message length (longer = more passionate)
-    if len(message) > 200:
-        pressure += 1.0
-    
-    # Cap at 10.0
-    return min(pressure, 10.0)
+@st.cache_resource
+def load_sensor():
+    """Load the embedding model and anchor bank once per Space process, not per rerun"""
+    return SemanticTensionSensor.get_sensor()
+
+@st.cache_resource
+def get_http_client():
+    return httpx.Client(timeout=httpx.Timeout(30.0, connect=5.0))
+
+# Below the APEX_CLOUD threshold, the demo splits LOCAL_WARM turns into two display bands
+MODERATE_PRESSURE = 4.0
 
 # Routing decision
 def route_debate(pressure: float) -> tuple:
     """Route debate to appropriate model based on pressure"""
-    if pressure > 7.2:
+    if route_tier(pressure, apex_available=True) == "APEX_CLOUD":
         return "APEX_CLOUD", "🔥 HIGH INTENSITY", "#ff4444"
-    elif pressure > 4.0:
+    elif pressure > MODERATE_PRESSURE:
         return "LOCAL_WARM", "🌡️ MODERATE", "#ffaa00"
     else:
         return "LOCAL_WARM", "❄️ LOW INTENSITY", "#4444ff"
 
 # Mock response generator
-def generate_mock_response(user_message: str, pressure: float, turn_number: int) -> str:
-    """Generate contextual mock responses based on pressure and content"""
+def generate_mock_response(user_message: str, routing: str, pressure: float, turn_number: int) -> str:
+    """Generate contextual mock responses based on the routed tier and pressure"""
     
     # Low pressure responses (calm, analytical)
     low_pressure_responses = [
@@ -73,21 +84,52 @@ def generate_mock_response(user_message: str, pressure: float, turn_number: int)
         "This is precisely why we need AI—to solve the complex problems you're describing! Climate change, disease, poverty—these require computational power beyond human capacity. AI is our best tool for survival.",
     ]
     
-    # Select response based on pressure
-    if pressure > 7.2:
+    # Select response from the same band route_debate reports
+    if routing == "APEX_CLOUD":
         response = random.choice(high_pressure_responses)
-    elif pressure > 4.0:
+    elif pressure > MODERATE_PRESSURE:
         response = random.choice(medium_pressure_responses)
     else:
         response = random.choice(low_pressure_responses)
     
     return response
 
+def stream_mock(text: str):
+    """Yield the mock response token by token, as a streaming backend would"""
+    yield from re.findall(r'\S+\s*', text)
+
+def stream_llm(history: list):
+    """Yield content deltas from an OpenAI-compatible chat completions stream"""
+    payload = {
+        "model": LLM_MODEL,
+        "messages": [{"role": "system", "content": SYSTEM_PROMPT}] + history[-10:],
+        "max_tokens": 256,
+        "stream": True,
+    }
+    headers = {"Authorization": f"Bearer {LLM_KEY}"} if LLM_KEY else {}
+    with get_http_client().stream("POST", LLM_URL, json=payload, headers=headers) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+# Warm the embedding model before the first message
+load_sensor()
+
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 if 'turn_number' not in st.session_state:
     st.session_state.turn_number = 0
+if 'history' not in st.session_state:
+    # Raw debate turns for the LLM context, without the analysis markup
+    st.session_state.history = []
 
 # Header
 st.markdown("""
@@ -101,14 +143,14 @@ st.markdown("""
 # Info section
 with st.expander("ℹ️ How This Demo Works"):
     st.markdown("""
-    This is a **mock demo** that simulates the Vertex DebSpar AI v3.0 hybrid debate system:
+    This demo runs the Vertex DebSpar AI v3.0 scoring pipeline from the production backend:
     
-    - **Pressure Detection:** Analyzes your message for assertive language, tension words, and debate intensity (0-10 scale)
-    - **Hybrid Routing:** Routes to APEX_CLOUD (high pressure >7.2) or LOCAL_WARM (low pressure ≤7.2)
-    - **Mock Responses:** Pre-programmed responses that adapt to debate pressure
-    - **Real-time Analysis:** Shows pressure metrics and routing decisions
+    - **Pressure Detection:** The production estimator scores assertive language, semantic tension against the anchor bank, and rebuttal-clock urgency (0-10 scale)
+    - **Hybrid Routing:** The production router sends APEX_CLOUD (high pressure >7.2) or LOCAL_WARM (low pressure ≤7.2)
+    - **Streaming Responses:** Tokens stream from an OpenAI-compatible backend when `DEMO_LLM_URL` is set, otherwise from a local mock
+    - **Real-time Analysis:** Shows pressure metrics, routing decisions and measured response time
     
-    **Note:** This demo uses mock responses. The full system requires deployment with a Groq API key and optional GPU.
+    **Note:** Without `DEMO_LLM_URL` responses are pre-programmed. The full system requires deployment with a Groq API key and optional GPU.
     
     **Try it:** Make increasingly assertive arguments to see the pressure rise and routing switch!
     """)
@@ -125,6 +167,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Simulated rebuttal clock; time pressure feeds the urgency term of the estimator
+rebuttal_timer = st.sidebar.slider("⏱️ Rebuttal time remaining (s)", 1.0, 30.0, 30.0, 0.5)
+
 # Display chat messages
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -138,47 +183,61 @@ if prompt := st.chat_input("Type your argument here..."):
     
     # Add user message to chat history
     st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.history.append({"role": "user", "content": prompt})
     
     # Display user message
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Calculate pressure
-    pressure = estimate_pressure(prompt, turn)
+    # Calculate pressure with the production estimator
+    pressure = estimate_debate_pressure(prompt, rebuttal_timer)
     
     # Route decision
     routing, intensity_label, color = route_debate(pressure)
     
-    # Generate response
-    response_text = generate_mock_response(prompt, pressure, turn)
-    
-    # Format system response with metadata
-    system_response = f"""**[Turn {turn}] System Analysis:**
+    analysis = f"""**[Turn {turn}] System Analysis:**
 - **Pressure:** {pressure:.1f}/10 {intensity_label}
 - **Routing:** {routing}
-- **Response Time:** {random.randint(80, 400)}ms
-
+"""
+    
+    # Display assistant response as tokens arrive
+    with st.chat_message("assistant"):
+        st.markdown(analysis)
+        message_placeholder = st.empty()
+        started = time.perf_counter()
+        first_token = None
+        response_text = ""
+        if LLM_URL:
+            tokens = stream_llm(st.session_state.history)
+        else:
+            tokens = stream_mock(generate_mock_response(prompt, routing, pressure, turn))
+        try:
+            for token in tokens:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                response_text += token
+                message_placeholder.markdown(response_text + "▌")
+        except Exception as e:
+            response_text += f"\n\n_(backend error: {e})_"
+        elapsed = time.perf_counter() - started
+        timing = f"- **Response Time:** {elapsed * 1000:.0f}ms (first token {(first_token or elapsed) * 1000:.0f}ms)\n"
+        message_placeholder.markdown(response_text)
+        st.markdown(timing)
+    
+    system_response = f"""{analysis}{timing}
 **System Response:**
 {response_text}
 """
     
     # Add assistant message to chat history
     st.session_state.messages.append({"role": "assistant", "content": system_response})
-    
-    # Display assistant response with streaming effect
-    with st.chat_message("assistant"):
-        message_placeholder = st.empty()
-        full_response = ""
-        for chunk in system_response.split():
-            full_response += chunk + " "
-            time.sleep(0.02)
-            message_placeholder.markdown(full_response + "▌")
-        message_placeholder.markdown(system_response)
+    st.session_state.history.append({"role": "assistant", "content": response_text})
 
 # Reset button
 if st.button("🔄 Reset Debate"):
     st.session_state.messages = []
     st.session_state.turn_number = 0
+    st.session_state.history = []
     st.rerun()
 
 # Footer
@@ -186,5 +245,5 @@ st.markdown("""
 ---
 **Vertex DebSpar AI v3.0** | [GitHub Repository](https://github.com/brian95240/vertex-debspar-ai-v3) | [Documentation](https://github.com/brian95240/vertex-debspar-ai-v3#readme)
 
-*This is a mock demo. For the full system with real LLM integration, see the deployment guide.*
+*Pressure scoring and routing run on the production backend code. Replies come from `DEMO_LLM_URL` when set, otherwise from a local mock; see the deployment guide for the full system.*
 """)
@@ -184,6 +184,26 @@ class BackendSmokeTest:
             assert manager.active_connections == {}, "Active connections should be empty"
             assert manager.brain is not None, "Brain should be initialized"
             
+            class FakeSocket:
+                def __init__(self):
+                    self.sent, self.closed = [], False
+                async def accept(self):
+                    pass
+                async def send_json(self, data):
+                    self.sent.append(data)
+                async def close(self, code=1000):
+                    self.closed = True
+            
+            live, silent = FakeSocket(), FakeSocket()
+            await manager.connect(live)
+            await manager.connect(silent)
+            await manager.process_message(live, {"type": "pong"})
+            manager.last_seen[silent] -= manager.heartbeat_interval * manager.heartbeat_misses + 1
+            await manager.check_heartbeats()
+            assert silent.closed and silent not in manager.active_connections, "Silent socket should be closed"
+            assert live.sent == [{"type": "ping"}] and live in manager.active_connections, "Live socket should be pinged"
+            manager.disconnect(live)
+            
             print(f"  ✓ Manager initialized")
             print(f"  ✓ Active connections: {len(manager.active_connections)}")
             print(f"  ✓ Brain instance: {manager.brain.__class__.__name__}")
@@ -195,6 +215,391 @@ class BackendSmokeTest:
             self.test_results["errors"].append(f"Debate manager init: {str(e)}")
             return False
     
+    async def test_transcript_log(self):
+        """Test 6: Verify transcript log round-trips through sealed segments"""
+        print("\n[TEST 6] Transcript Log...")
+        try:
+            import tempfile
+            from debate_vertex.core.transcript import TranscriptLog, replay, turn_record
+            
+            with tempfile.TemporaryDirectory() as tmp:
+                log = TranscriptLog(tmp, segment_bytes=512, batch_size=8, writer_id="pod-a")
+                for i in range(50):
+                    log.append(turn_record(f"s{i % 2}", i, "user", f"argument {i}", 5.0, "LOCAL_WARM", 12.5))
+                
+                # A second writer (rolling update) must not seal the live writer's segment
+                other = TranscriptLog(tmp, segment_bytes=512, writer_id="pod-b")
+                other.append(turn_record("s9", 0, "user", "other pod", 5.0, "LOCAL_WARM"))
+                other.close()
+                log.close()
+                
+                sealed = list(Path(tmp).rglob("*.log.z"))
+                assert len(sealed) > 2, "Log should rotate into several sealed segments"
+                assert not list(Path(tmp).rglob("*.log")), "Close should seal the active segment"
+                
+                records = list(replay(tmp))
+                assert [r["turn"] for r in records if r["session_id"] != "s9"] == list(range(50)), "Replay should preserve order"
+                assert len(list(replay(tmp, session_id="s1"))) == 25, "Session filter should apply"
+                assert len(list(replay(tmp, session_id="s9"))) == 1, "Every writer should be replayed"
+            
+            print(f"  ✓ Sealed segments: {len(sealed)}")
+            print(f"  ✓ Replayed records: {len(records)}")
+            
+            self.test_results["tests"]["transcript_log"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Transcript log: {str(e)}")
+            return False
+    
+    async def test_capacity_simulator(self):
+        """Test 7: Verify the capacity simulator sweeps routing settings"""
+        print("\n[TEST 7] Capacity Simulator...")
+        try:
+            from debate_vertex.core.simulator import SimConfig, simulate, synthetic_trace
+            
+            trace = synthetic_trace(500, seed=1)
+            low = simulate(trace, SimConfig(apex_threshold=0.0))
+            high = simulate(trace, SimConfig(apex_threshold=10.0))
+            
+            assert low.messages == high.messages == len(trace), "Every message should be simulated"
+            assert low.apex_requests == len(trace), "Threshold 0 should route everything to apex"
+            assert high.apex_requests == 0 and high.apex_spend == 0, "Threshold 10 should stay local"
+            assert 0 <= high.timer_miss_rate <= 1, "Miss rate should be a fraction"
+            
+            print(f"  ✓ Messages simulated: {len(trace)}")
+            print(f"  ✓ All-local timer miss rate: {high.timer_miss_rate:.3f}")
+            
+            self.test_results["tests"]["capacity_simulator"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Capacity simulator: {str(e)}")
+            return False
+    
+    async def test_apex_rate_limiter(self):
+        """Test 8: Verify apex rate limiting honors provider headers"""
+        print("\n[TEST 8] Apex Rate Limiter...")
+        try:
+            import httpx
+            from debate_vertex.models.brain_router import HybridBrain
+            from debate_vertex.models.rate_limiter import parse_reset
+            
+            assert parse_reset("2m59.56s") == 179.56, "Minute/second durations should parse"
+            assert parse_reset("120ms") == 0.12, "Millisecond durations should parse"
+            
+            calls = {"apex": 0, "local": 0}
+            
+            def handler(request):
+                if request.method == "GET":
+                    return httpx.Response(200)
+                if "groq" in str(request.url):
+                    calls["apex"] += 1
+                    return httpx.Response(429, headers={"retry-after": "30", "x-ratelimit-remaining-tokens": "0"})
+                calls["local"] += 1
+                return httpx.Response(200, json=self.mock_responses["local"])
+            
+            brain = HybridBrain()
+            brain.apex_key = "test-key"
+            brain.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            messages = [{"role": "user", "content": "You are wrong"}]
+            
+            first = await brain._call_apex(messages)
+            second = await brain._call_apex(messages)
+            
+            assert first == second == self.mock_responses["local"]["choices"][0]["message"]["content"]
+            assert calls["apex"] == 1, "Limiter should stop sending to apex after a 429"
+            assert calls["local"] == 2, "Both turns should fall back to local"
+            assert brain.apex_limiter.metrics()["apex_blocked_seconds"] > 0
+            
+            # Header sync must not refund usage or adopt the per-day request limit
+            from debate_vertex.models.rate_limiter import ApexRateLimiter
+            limiter = ApexRateLimiter(requests_per_minute=30, tokens_per_minute=12000)
+            headers = {
+                "x-ratelimit-limit-requests": "14400", "x-ratelimit-remaining-requests": "14399",
+                "x-ratelimit-limit-tokens": "12000", "x-ratelimit-remaining-tokens": "11800",
+            }
+            limiter.reserve(1100)
+            limiter.update_from_headers(headers)
+            limiter.reconcile(1100, 200, headers)
+            assert limiter.tokens.level <= 11800.5, "Reconcile should not refund on top of provider remaining"
+            assert limiter.requests.capacity == 30, "Daily request limit should not replace the RPM cap"
+            assert limiter.requests.level < 30, "Daily remaining count should not refill the RPM bucket"
+            
+            # Headers from the first reply of a concurrent wave must not hand back the others' reservations
+            burst = ApexRateLimiter(requests_per_minute=30, tokens_per_minute=12000, max_queue_wait=1.0)
+            for _ in range(10):
+                assert burst.reserve(1100) == 0.0
+            burst.release(1100)
+            burst.update_from_headers({"x-ratelimit-limit-tokens": "12000", "x-ratelimit-remaining-tokens": "11700"})
+            assert burst.tokens.level <= 11700 - 9 * 1100 + 1, "In-flight reservations should stay spent"
+            admitted = sum(burst.reserve(1100) is not None for _ in range(10))
+            assert admitted == 1, "Only what is left of the budget should be admitted in a second wave"
+            
+            print(f"  ✓ Apex calls after 429: {calls['apex']}")
+            print(f"  ✓ Local fallbacks: {calls['local']}")
+            
+            self.test_results["tests"]["apex_rate_limiter"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Apex rate limiter: {str(e)}")
+            return False
+    
+    async def test_local_endpoint_pool(self):
+        """Test 9: Verify least-outstanding balancing and ejection"""
+        print("\n[TEST 9] Local Endpoint Pool...")
+        try:
+            import httpx
+            from debate_vertex.models.brain_router import EndpointPool
+            
+            pool = EndpointPool(["http://a:8000/v1/chat/completions", "http://b:8000/v1/chat/completions"], eject_after=2)
+            a, b = pool.endpoints.values()
+            
+            a.outstanding = 3
+            assert pool.pick() is b, "Least-loaded endpoint should be picked"
+            a.outstanding = 0
+            
+            def handler(request):
+                if request.method == "GET":
+                    return httpx.Response(503 if request.url.host == "a" else 200)
+                return httpx.Response(500 if request.url.host == "a" else 200, json={})
+            
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            b.outstanding = 1
+            await pool.post(client, json={})
+            await pool.post(client, json={})
+            b.outstanding = 0
+            assert not a.healthy, "Endpoint should be ejected after repeated failures"
+            assert pool.pick() is b, "Ejected endpoint should not receive traffic"
+            pool._probe_task.cancel()
+            
+            print(f"  ✓ Healthy endpoints: {pool.metrics()['local_endpoints_healthy']}/2")
+            
+            self.test_results["tests"]["local_endpoint_pool"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Local endpoint pool: {str(e)}")
+            return False
+    
+    async def test_deadline_generation_length(self):
+        """Test 10: Verify max_tokens shrinks with the rebuttal window"""
+        print("\n[TEST 10] Deadline-Adaptive Generation...")
+        try:
+            from debate_vertex.models.generation import ThroughputEstimator, stop_sequences, trim_to_sentence
+            
+            speed = ThroughputEstimator(tokens_per_second=40.0, overhead=0.3)
+            relaxed = speed.max_tokens(30.0, ceiling=512)
+            rushed = speed.max_tokens(2.0, ceiling=512)
+            assert relaxed == 512, "A long window should keep the full ceiling"
+            assert rushed < relaxed, "A short window should cap generation length"
+            assert speed.max_tokens(None, ceiling=512) == 512, "No timer means no cap"
+            assert speed.max_tokens(-1.0, ceiling=512, floor=48) == 48, "Expired timer should get the floor"
+            assert stop_sequences(512, 512) is None, "Uncapped replies should keep paragraph breaks"
+            assert stop_sequences(rushed, 512), "Capped replies should stop at a paragraph break"
+            
+            # Time spent queueing for apex budget comes out of the reply's length budget
+            import httpx
+            from debate_vertex.models.brain_router import HybridBrain
+            from debate_vertex.models.rate_limiter import estimate_tokens
+            sent = []
+            
+            def handler(request):
+                if request.method == "GET":
+                    return httpx.Response(200)
+                sent.append(json.loads(request.content))
+                return httpx.Response(200, json=self.mock_responses["apex"])
+            
+            brain = HybridBrain()
+            brain.apex_key = "test-key"
+            brain.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            messages = [{"role": "user", "content": "You are wrong"}]
+            unqueued = brain.apex_speed.max_tokens(2.0, ceiling=1024)
+            after_wait = brain.apex_speed.max_tokens(1.5, ceiling=1024)
+            brain.apex_limiter.tokens.level = estimate_tokens(messages, unqueued) - 0.5 * brain.apex_limiter.tokens.rate
+            await brain._call_apex(messages, time.monotonic() + 2.0)
+            assert abs(sent[0]["max_tokens"] - after_wait) <= 2 < unqueued - after_wait, "Queue wait should shrink max_tokens"
+            assert brain.apex_limiter.outstanding_tokens == 0, "Resized reservation should be fully released"
+            
+            speed.observe(latency=2.3, completion_tokens=200)
+            assert speed.tokens_per_second > 40.0, "Fast responses should raise the estimate"
+            
+            trimmed = trim_to_sentence("Your premise fails. The data shows otherwise. And furth")
+            assert trimmed == "Your premise fails. The data shows otherwise.", "Partial sentence should be dropped"
+            
+            print(f"  ✓ max_tokens at 30s: {relaxed}, at 2s: {rushed}")
+            print(f"  ✓ Trimmed: {trimmed}")
+            
+            self.test_results["tests"]["deadline_generation"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Deadline generation: {str(e)}")
+            return False
+    
+    async def test_session_hibernation(self):
+        """Test 11: Verify idle sessions hibernate and restore transparently"""
+        print("\n[TEST 11] Session Hibernation...")
+        try:
+            import tempfile
+            from debate_vertex.orchestrator.sessions import SessionStore
+            from debate_vertex.orchestrator.state import DebateState
+            
+            with tempfile.TemporaryDirectory() as tmp:
+                store = SessionStore(tmp, max_resident=2, idle_seconds=60)
+                for i in range(3):
+                    state = DebateState(session_id=f"s{i}")
+                    state.add_turn("user", f"argument {i}")
+                    await store.add(state)
+                
+                assert list(store.resident) == ["s1", "s2"], "Coldest session should be evicted by the cap"
+                assert store.hibernated == {"s0"}, "Evicted session should be hibernated"
+                
+                restored = await store.acquire("s0")
+                assert restored.history[0]["content"] == "argument 0", "Snapshot should restore history"
+                assert "s0" in store.resident and "s0" not in store.hibernated
+                await store.release("s0")
+                assert "s1" in store.hibernated, "Restoring should evict the next coldest session"
+                
+                # A session reacquired while its snapshot is still being written comes back from memory
+                flushing = asyncio.ensure_future(store.hibernate("s2"))
+                await asyncio.sleep(0)
+                assert (await store.acquire("s2")).session_id == "s2"
+                assert await flushing is False and "s2" not in store.hibernated
+                assert not store._path("s2").exists(), "Abandoned snapshot should be deleted"
+                await store.release("s2")
+                
+                store.resident["s0"].last_active -= 120
+                assert await store.hibernate_idle() == 1, "Idle session should hibernate"
+                assert store.resident_bytes == store.resident["s2"].memory_bytes()
+            
+            print(f"  ✓ Hibernated: {sorted(store.hibernated)}")
+            print(f"  ✓ Resident bytes: {store.resident_bytes}")
+            
+            self.test_results["tests"]["session_hibernation"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Session hibernation: {str(e)}")
+            return False
+    
+    async def test_anchor_bank(self):
+        """Test 12: Verify categorised anchor bank scoring"""
+        print("\n[TEST 12] Tension Anchor Bank...")
+        try:
+            import json
+            import tempfile
+            import numpy as np
+            from debate_vertex.orchestrator.anchor_bank import AnchorBank, DEFAULT_ANCHORS_PATH
+            
+            rng = np.random.default_rng(0)
+            vectors = {}
+            
+            def encode(phrases):
+                return np.stack([vectors.setdefault(p, rng.normal(size=384)) for p in phrases])
+            
+            spec = json.loads(DEFAULT_ANCHORS_PATH.read_text())
+            bank = AnchorBank.from_spec(spec, encode)
+            assert bank.matrix.dtype == np.float32 and bank.matrix.flags["C_CONTIGUOUS"]
+            
+            scores = bank.score(vectors["Prove me wrong"])
+            assert max(scores, key=scores.get) == "burden_shift", "Exact anchor should win its category"
+            assert abs(scores["burden_shift"] - 1.0) < 1e-5, "Exact anchor should have cosine 1"
+            
+            assert bank.scale(bank.similarities(vectors["Prove me wrong"]))[bank.categories.index("burden_shift")] == 10.0
+            assert (bank.floors >= 0.2).all() and (bank.ceilings > bank.floors).all(), "Calibrated scale should stay ordered"
+            
+            def per_call_ms(b, top_k):
+                # Best of a few batches so a noisy neighbour does not fail the run
+                best = float("inf")
+                for _ in range(5):
+                    started = time.perf_counter()
+                    for _ in range(100):
+                        b.similarities(query, top_k=top_k)
+                    best = min(best, (time.perf_counter() - started) * 10)
+                return best
+            
+            query = rng.normal(size=384)
+            shipped_ms = per_call_ms(bank, 1)
+            assert shipped_ms < 1.0, "Shipped anchor bank should score well under a millisecond"
+            big = {f"c{i}": {"anchors": [f"c{i}-{j}" for j in range(250)]} for i in range(20)}
+            big_bank = AnchorBank.from_spec(big, encode)
+            big_ms = per_call_ms(big_bank, 3)
+            assert big_ms < 5.0, "Thousands of anchors should still score in a few milliseconds"
+            
+            # An unwritable or corrupt cache falls back to encoding instead of failing the sensor
+            with tempfile.TemporaryDirectory() as tmp:
+                blocker = Path(tmp) / "not-a-dir"
+                blocker.write_text("")
+                assert len(AnchorBank.from_spec(spec, encode, cache_dir=str(blocker / "cache")).matrix) == len(bank.matrix)
+                cached = AnchorBank.from_spec(spec, encode, cache_dir=tmp)
+                for stale in Path(tmp).glob("anchors-*.npy"):
+                    stale.write_bytes(b"corrupt")
+                assert np.allclose(AnchorBank.from_spec(spec, encode, cache_dir=tmp).matrix, cached.matrix)
+            
+            print(f"  ✓ Shipped bank scoring: {shipped_ms:.3f} ms, 5000-anchor top-3: {big_ms:.3f} ms")
+            
+            self.test_results["tests"]["anchor_bank"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Anchor bank: {str(e)}")
+            return False
+    
+    async def test_threshold_controller(self):
+        """Test 13: Verify the routing threshold adapts to tier load"""
+        print("\n[TEST 13] Threshold Controller...")
+        try:
+            from debate_vertex.models.threshold_controller import ControllerConfig, ThresholdController
+            from debate_vertex.core.simulator import SimConfig, simulate, synthetic_trace
+            
+            saturated = ThresholdController(ControllerConfig(interval=1.0))
+            saturated.update(0.0, local_outstanding=0, local_capacity=8)
+            for t in range(1, 20):
+                saturated.update(float(t), local_outstanding=24, local_capacity=8)
+            assert saturated.threshold < 7.2, "Saturated GPU should spill more traffic to apex"
+            assert saturated.threshold >= saturated.config.min_threshold, "Threshold should respect bounds"
+            
+            throttled = ThresholdController(ControllerConfig(interval=1.0))
+            throttled.update(0.0, local_outstanding=0, local_capacity=8)
+            for t in range(1, 20):
+                throttled.update(float(t), local_outstanding=0, local_capacity=8, apex_throttled=True)
+            assert throttled.threshold > 7.2, "Throttled apex should keep more traffic local"
+            
+            # A brief apex slowdown must not pin the threshold once apex traffic stops
+            slow = ThresholdController(ControllerConfig(interval=1.0))
+            slow.update(0.0, local_outstanding=0, local_capacity=8)
+            for t in range(1, 11):
+                slow.observe_turn("APEX_CLOUD", 4.0)
+                slow.update(float(t), local_outstanding=0, local_capacity=8)
+            assert slow.threshold == slow.config.max_threshold, "Slow apex should push the threshold up"
+            for t in range(11, 300):
+                slow.update(float(t), local_outstanding=0, local_capacity=8)
+            assert abs(slow.threshold - 7.2) < 0.1, "Threshold should recover once the slowdown fades"
+            
+            from debate_vertex.models.brain_router import HybridBrain
+            with patch.dict(os.environ, {"APEX_COST_PER_REQUEST": "0.002"}):
+                priced = HybridBrain()
+            assert priced.threshold_controller.config.apex_cost_per_request == 0.002, "Apex cost should come from the env"
+            
+            # Offline replay: adaptive routing should not miss more timers than the fixed cutoff
+            trace = synthetic_trace(1000, sessions_per_second=0.8, seed=2)
+            fixed = simulate(trace, SimConfig())
+            adaptive = simulate(trace, SimConfig(adaptive=True))
+            assert adaptive.timer_miss_rate <= fixed.timer_miss_rate, "Adaptive threshold should reduce misses"
+            
+            print(f"  ✓ Saturated GPU threshold: {saturated.threshold:.2f}")
+            print(f"  ✓ Throttled apex threshold: {throttled.threshold:.2f}")
+            print(f"  ✓ Replay miss rate fixed {fixed.timer_miss_rate:.3f} vs adaptive {adaptive.timer_miss_rate:.3f}")
+            
+            self.test_results["tests"]["threshold_controller"] = "PASS"
+            return True
+        except Exception as e:
+            print(f"  ✗ FAILED: {e}")
+            self.test_results["errors"].append(f"Threshold controller: {str(e)}")
+            return False
+    
     async def run_all_tests(self):
         """Run all smoke tests"""
         print("=" * 70)
@@ -210,6 +615,14 @@ class BackendSmokeTest:
         results.append(await self.test_state_management())
         results.append(await self.test_hybrid_brain_routing())
         results.append(await self.test_debate_manager_initialization())
+        results.append(await self.test_transcript_log())
+        results.append(await self.test_capacity_simulator())
+        results.append(await self.test_apex_rate_limiter())
+        results.append(await self.test_local_endpoint_pool())
+        results.append(await self.test_deadline_generation_length())
+        results.append(await self.test_session_hibernation())
+        results.append(await self.test_anchor_bank())
+        results.append(await self.test_threshold_controller())
         
         # Summary
         print("\n" + "=" * 70)